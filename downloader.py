@@ -1,22 +1,25 @@
 import argparse
+import asyncio
+import contextlib
+import hashlib
 import json
 import logging
 import os
+import re
 import sys
 import time
-import urllib.error
-import urllib.parse as urlparse
-import urllib.request as urllib2
-from concurrent.futures import ThreadPoolExecutor
+import urllib.parse
 
-from bs4 import BeautifulSoup
+import httpx
+from selectolax.lexbor import LexborHTMLParser
 
 try:
     from tqdm import tqdm
 
     TQDM_AVAILABLE = True
 except ImportError:
-    from tqdm import tqdm
+    # Les barres de progression ne sont utilisées que si TQDM_AVAILABLE est vrai
+    tqdm = None
 
     TQDM_AVAILABLE = False
     print("Note: Pour avoir des barres de progression, installez tqdm avec: pip install tqdm")
@@ -27,7 +30,8 @@ try:
 
     MUTAGEN_AVAILABLE = True
 except ImportError:
-    from mutagen.flac import FLAC
+    # Les métadonnées ne sont ajoutées que si MUTAGEN_AVAILABLE est vrai
+    FLAC = None
 
     MUTAGEN_AVAILABLE = False
     print("Note: Pour ajouter des métadonnées, installez mutagen avec: pip install mutagen")
@@ -35,6 +39,12 @@ except ImportError:
 # Configuration de base
 BASE_URL = 'https://downloads.khinsider.com'
 CONFIG_FILE = 'khinsider_config.json'
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'khinsider')
+ALBUM_CACHE_MAX_AGE = 24 * 60 * 60  # 1 jour
+TRACK_SIZES_FILE = '.sizes.json'
+MAX_RETRY_DELAY = 60  # secondes
+METADATA_PADDING = 1024  # octets
+MAX_CONCURRENT_ALBUMS = 2
 DEFAULT_CONFIG = {
     'output_directory': os.path.join(os.path.expanduser('~'), 'E:\\Musique'),
     'max_threads': 3,
@@ -44,6 +54,14 @@ DEFAULT_CONFIG = {
     'retry_delay': 5
 }
 
+# Caractères interdits dans les noms de fichiers Windows: \ / : * ? " < > |
+SANITIZE_TABLE = str.maketrans(dict.fromkeys('\\/:*?"<>|'))
+
+# Texte d'un lien de téléchargement ("Click here to download as FLAC"), puis taille du fichier ("(25.3 MB" ...)
+DOWNLOAD_LINK_TEXT = "Click here to download as "
+DOWNLOAD_LINK_RE = re.compile(DOWNLOAD_LINK_TEXT + r'(\w+)')
+FILE_SIZE_RE = re.compile(r'\((\d+(?:\.\d+)?)\s*MB')
+
 # Configuration du logging
 logging.basicConfig(
     level=logging.INFO,
@@ -55,6 +73,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger("KHInsiderDownloader")
 
+# Vérification de la disponibilité du format FLAC (tâche asyncio) par dossier d'album sur le serveur
+FLAC_AVAILABILITY = {}
+
+
+def create_client(config):
+    """Crée le client HTTP asynchrone partagé, qui réutilise les connexions ouvertes"""
+    limits = httpx.Limits(
+        max_connections=config['max_threads'],
+        max_keepalive_connections=config['max_threads']
+    )
+
+    return httpx.AsyncClient(limits=limits, timeout=30, follow_redirects=True)
+
 
 def load_config():
     """Charge la configuration depuis le fichier ou utilise les valeurs par défaut"""
@@ -93,29 +124,122 @@ def validate_url(url):
     return True
 
 
-def safe_request(url, retry_count=3, retry_delay=5):
-    """Effectue une requête avec gestion d'erreur et tentatives multiples"""
+def get_retry_delay(retry_delay, attempt):
+    """Calcule le délai avant une nouvelle tentative (exponentiel, plafonné)"""
+    return min(MAX_RETRY_DELAY, retry_delay * 2 ** attempt)
+
+
+def is_retryable_status(status_code):
+    """Indique si un code HTTP correspond à une erreur temporaire du serveur"""
+    return status_code == 429 or status_code >= 500
+
+
+@contextlib.asynccontextmanager
+async def safe_request(client, url, retry_count=3, retry_delay=5, headers=None):
+    """Ouvre une requête en streaming avec gestion d'erreur et tentatives multiples"""
     for attempt in range(retry_count):
         try:
-            return urllib2.urlopen(url)
-        except urllib.error.URLError as e:
+            request = client.build_request('GET', url, headers=headers)
+            response = await client.send(request, stream=True)
+        except httpx.TransportError as e:
             logger.warning(f"Erreur de connexion (tentative {attempt + 1}/{retry_count}): {e}")
-            if attempt < retry_count - 1:
-                logger.info(f"Nouvelle tentative dans {retry_delay} secondes...")
-                time.sleep(retry_delay)
-            else:
-                logger.error(f"Échec après {retry_count} tentatives: {url}")
-                raise
+            error = e
+        else:
+            if not is_retryable_status(response.status_code):
+                try:
+                    # Les autres erreurs (404...) sont définitives : inutile de réessayer
+                    if response.is_error:
+                        response.raise_for_status()
 
+                    yield response
+                finally:
+                    await response.aclose()
 
-def get_album_info(url, config):
+                return
+
+            await response.aclose()
+            logger.warning(f"Serveur indisponible (tentative {attempt + 1}/{retry_count}): HTTP {response.status_code}")
+            error = None
+
+        if attempt < retry_count - 1:
+            delay = get_retry_delay(retry_delay, attempt)
+            logger.info(f"Nouvelle tentative dans {delay} secondes...")
+            await asyncio.sleep(delay)
+        else:
+            logger.error(f"Échec après {retry_count} tentatives: {url}")
+            if error:
+                raise error
+            response.raise_for_status()
+
+
+async def fetch_html(client, url, retry_count=3, retry_delay=5, headers=None):
+    """Récupère une page HTML et l'analyse"""
+    # L'arbre vaut None si le serveur indique que la page n'a pas changé (304)
+    async with safe_request(client, url, retry_count, retry_delay, headers) as response:
+        if response.status_code == 304:
+            return response, None
+
+        # Les pages de KHInsider sont en UTF-8 : lexbor les lit directement, sans détection d'encodage
+        return response, LexborHTMLParser(await response.aread())
+
+
+def get_album_cache_path(url):
+    """Retourne le chemin du fichier de cache associé à l'URL d'un album"""
+    return os.path.join(CACHE_DIR, hashlib.md5(url.encode('utf-8')).hexdigest() + '.json')
+
+
+def load_album_cache(url):
+    """Charge les informations d'un album depuis le cache disque, si présentes"""
+    cache_path = get_album_cache_path(url)
+    if not os.path.exists(cache_path):
+        return None
+
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"Erreur lors de la lecture du cache de l'album: {e}")
+
+        return None
+
+
+def save_album_cache(url, album_info, etag=None):
+    """Sauvegarde les informations d'un album dans le cache disque"""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(get_album_cache_path(url), 'w', encoding='utf-8') as f:
+            json.dump({'timestamp': time.time(), 'etag': etag, 'album_info': album_info}, f)
+    except Exception as e:
+        logger.warning(f"Erreur lors de la sauvegarde du cache de l'album: {e}")
+
+
+async def get_album_info(client, url, config):
     """Extrait les informations de l'album depuis l'URL"""
     try:
-        response = safe_request(url, config['retry_attempts'], config['retry_delay'])
-        soup = BeautifulSoup(response, features="html.parser")
+        # Utiliser le cache s'il est récent
+        cached = load_album_cache(url)
+        if cached and time.time() - cached['timestamp'] < ALBUM_CACHE_MAX_AGE:
+            album_info = cached['album_info']
+            logger.info(f"Album trouvé dans le cache: {album_info['title']} ({len(album_info['tracks'])} pistes)")
+
+            return album_info
+
+        # Sinon, revalider le cache auprès du serveur grâce à l'ETag
+        headers = None
+        if cached and cached.get('etag'):
+            headers = {'If-None-Match': cached['etag']}
+
+        response, tree = await fetch_html(client, url, config['retry_attempts'], config['retry_delay'], headers)
+        if cached and response.status_code == 304:
+            album_info = cached['album_info']
+            save_album_cache(url, album_info, cached['etag'])
+            logger.info(f"Album inchangé depuis la mise en cache: {album_info['title']}")
+
+            return album_info
 
         # Récupérer le titre de l'album
-        album_title = soup.find('h2').text.strip() if soup.find('h2') else "Unknown Album"
+        title_node = tree.css_first('h2')
+        album_title = title_node.text().strip() if title_node is not None else "Unknown Album"
         album_title = sanitize_filename(album_title)
 
         # Créer un dictionnaire pour stocker les informations
@@ -126,39 +250,38 @@ def get_album_info(url, config):
         }
 
         # Trouver la liste des chansons
-        song_list = soup.find(id="songlist")
-        if not song_list:
+        song_list = tree.css_first('#songlist')
+        if song_list is None:
             logger.error("Impossible de trouver la liste des chansons")
 
             return None
 
-        # Trouver toutes les lignes du tableau
-        rows = song_list.find_all('tr')
-
         track_count = 0
-        for row in rows:
-            # Chercher les cellules avec la classe "clickable-row"
-            cells = row.find_all('td', class_="clickable-row")
-            if cells and len(cells) > 0:
-                # Prendre le premier lien de la première cellule clickable
-                link = cells[0].find('a')
-                if link and link.get('href'):
-                    href = link.get('href')
-                    track_name = link.text.strip()
-
-                    # Utiliser directement l'URL du MP3 comme URL de la page de détail
-                    # Cette URL contient toutes les informations nécessaires
-                    detail_url = BASE_URL + href
-
-                    track_count += 1
-                    album_info['tracks'].append(
-                        {
-                            'name': track_name,
-                            'url': detail_url
-                        }
-                    )
+        for row in song_list.css('tr'):
+            # Prendre le premier lien de la première cellule "clickable-row"
+            cell = row.css_first('td.clickable-row')
+            link = cell.css_first('a') if cell is not None else None
+            href = link.attributes.get('href') if link is not None else None
+            if not href:
+                continue
+
+            track_name = link.text().strip()
+
+            # Utiliser directement l'URL du MP3 comme URL de la page de détail
+            # Cette URL contient toutes les informations nécessaires
+            detail_url = BASE_URL + href
+
+            track_count += 1
+            album_info['tracks'].append(
+                {
+                    'name': track_name,
+                    'url': detail_url
+                }
+            )
 
         logger.info(f"Album trouvé: {album_title} ({track_count} pistes)")
+        if track_count:
+            save_album_cache(url, album_info, response.headers.get('ETag'))
 
         return album_info
     except Exception as e:
@@ -167,8 +290,29 @@ def get_album_info(url, config):
         return None
 
 
-def get_track_download_url(track_url, format_preference):
+def normalize_url(url):
+    """Encode correctement le chemin d'une URL sans modifier ses paramètres"""
+    # Décoder puis réencoder le chemin, pour gérer les URLs déjà partiellement encodées
+    parts = urllib.parse.urlsplit(url)
+    path = urllib.parse.quote(urllib.parse.unquote(parts.path), safe='/')
+
+    return urllib.parse.urlunsplit(parts._replace(path=path))
+
+
+async def probe_flac(client, flac_url):
+    """Vérifie si une version FLAC de la piste existe sur le serveur"""
+    try:
+        # Requête HEAD : seul le code de statut nous intéresse
+        head = await client.head(flac_url, timeout=10)
+
+        return head.status_code == 200
+    except httpx.HTTPError:
+        return False
+
+
+async def get_track_download_url(client, track_url, config):
     """Récupère l'URL de téléchargement pour un format spécifié"""
+    format_preference = config['format_preference']
     try:
         # Si l'URL pointe directement vers un fichier MP3, extraire l'URL de la page de détail
         if track_url.endswith('.mp3'):
@@ -177,16 +321,15 @@ def get_track_download_url(track_url, format_preference):
         else:
             detail_url = track_url
 
-        response = safe_request(detail_url)
-        soup = BeautifulSoup(response, features="html.parser")
+        _, tree = await fetch_html(client, detail_url, config['retry_attempts'], config['retry_delay'])
 
         # Récupérer le titre de la piste
         track_title = None
-        title_element = soup.find('p', align="left")
-        if title_element:
-            bold_elements = title_element.find_all('b')
+        title_element = tree.css_first('p[align="left"]')
+        if title_element is not None:
+            bold_elements = title_element.css('b')
             if len(bold_elements) > 1:
-                track_title = bold_elements[1].text.strip()
+                track_title = bold_elements[1].text().strip()
 
         # Si le titre n'est pas trouvé, utiliser le nom du fichier
         if not track_title:
@@ -197,68 +340,65 @@ def get_track_download_url(track_url, format_preference):
 
         # Chercher les liens de téléchargement avec le texte "Click here to download as FLAC/MP3"
         download_links = {}
-        for format_type in format_preference:
-            links = soup.find_all('a')
-            for link in links:
-                # Vérifier si le lien contient le texte de téléchargement pour ce format
-                if link.text and f"Click here to download as {format_type.upper()}" in link.text:
-                    href = link.get('href')
-                    if href:
-                        # Trouver la taille du fichier
-                        file_size = 0
-                        size_text = link.parent.text if link.parent else ""
-                        if "MB" in size_text:
-                            try:
-                                size_str = size_text.split('(')[1].split(' MB')[0]
-                                file_size = float(size_str)
-                            except:
-                                pass
-
-                        download_links[format_type] = {
-                            'url': href,
-                            'format': format_type,
-                            'title': track_title,
-                            'size': file_size
-                        }
+        wanted_formats = {format_type.upper(): format_type for format_type in format_preference}
+        for link in tree.css('a[href]'):
+            # Le format vient du texte du lien lui-même : le parent peut contenir les liens de plusieurs formats
+            href = link.attributes.get('href')
+            link_text = link.text()
+            match = DOWNLOAD_LINK_RE.search(link_text)
+            format_type = wanted_formats.get(match.group(1)) if match else None
+            if not format_type or not href:
+                continue
+
+            # La taille suit le lien dans le texte du parent, avant un éventuel autre lien de téléchargement
+            file_size = 0
+            parent_text = link.parent.text() if link.parent is not None else ""
+            link_offset = parent_text.find(link_text)
+            if link_offset >= 0:
+                size_text = parent_text[link_offset + len(link_text):].split(DOWNLOAD_LINK_TEXT, 1)[0]
+                size_match = FILE_SIZE_RE.search(size_text)
+                if size_match:
+                    file_size = float(size_match.group(1))
+
+            download_links[format_type] = {
+                'url': href,
+                'format': format_type,
+                'title': track_title,
+                'size': file_size
+            }
 
         # Retourner le premier format disponible selon la préférence
         for format_type in format_preference:
             if format_type in download_links:
-                # Encode l'URL pour qu'elle soit sûre à utiliser avec urllib
-                url = download_links[format_type]['url']
-                # D'abord, décoder l'URL si elle contient des séquences comme %2520
-                url = urllib.parse.unquote(url)
-                # Ensuite, encoder correctement pour la requête HTTP
-                url = urllib.parse.quote(url, safe='/:')
-                download_links[format_type]['url'] = url
+                # Encode l'URL pour qu'elle soit sûre à utiliser pour la requête HTTP
+                download_links[format_type]['url'] = normalize_url(download_links[format_type]['url'])
 
                 return download_links[format_type]
 
         # Si aucun lien n'est trouvé, essayer de trouver un élément audio
-        audio = soup.find('audio')
-        if audio and audio.get('src'):
-            audio_src = audio.get('src')
-            # Décoder puis encoder correctement l'URL
-            audio_src = urllib.parse.unquote(audio_src)
-            audio_src = urllib.parse.quote(audio_src, safe='/:')
+        audio = tree.css_first('audio[src]')
+        if audio is not None and audio.attributes['src']:
+            audio_src = normalize_url(audio.attributes['src'])
 
             format_type = 'mp3'  # Par défaut
 
             # Vérifier si une version FLAC est disponible
-            if 'flac' in format_preference:
-                flac_url = audio_src.replace('.mp3', '.flac')
-                try:
-                    # Utiliser l'URL encodée pour la vérification
-                    urllib2.urlopen(flac_url)
-
+            audio_parts = urllib.parse.urlsplit(audio_src)
+            if 'flac' in format_preference and audio_parts.path.endswith('.mp3'):
+                # Ne remplacer l'extension que dans le chemin, pas dans les paramètres
+                flac_url = urllib.parse.urlunsplit(audio_parts._replace(path=audio_parts.path[:-4] + '.flac'))
+                album_key = audio_parts.netloc + audio_parts.path.rsplit('/', 1)[0]
+                # Une seule vérification par album, attendue par toutes les pistes résolues en même temps
+                if album_key not in FLAC_AVAILABILITY:
+                    FLAC_AVAILABILITY[album_key] = asyncio.ensure_future(probe_flac(client, flac_url))
+
+                if await FLAC_AVAILABILITY[album_key]:
                     return {
                         'url': flac_url,
                         'format': 'flac',
                         'title': track_title,
                         'size': 0
                     }
-                except:
-                    pass
 
             return {
                 'url': audio_src,
@@ -276,7 +416,7 @@ def get_track_download_url(track_url, format_preference):
         return None
 
 
-def download_file(url, file_path, expected_size=None, retry_count=3, retry_delay=5):
+async def download_file(client, url, file_path, expected_size=None, retry_count=3, retry_delay=5):
     """Télécharge un fichier avec gestion des interruptions et vérification de taille"""
     for attempt in range(retry_count):
         try:
@@ -289,33 +429,38 @@ def download_file(url, file_path, expected_size=None, retry_count=3, retry_delay
                     return True
 
             # Télécharger le fichier
-            response = safe_request(url)
-            total_size = int(response.info().get('Content-Length', 0))
-            downloaded = 0
-            chunk_size = 1024 * 8  # 8KB
-
-            with open(file_path, 'wb') as f:
-                if TQDM_AVAILABLE:
-                    pbar = tqdm(total=total_size, unit='B', unit_scale=True, desc=os.path.basename(file_path))
-
-                while True:
-                    chunk = response.read(chunk_size)
-                    if not chunk:
-                        break
-                    f.write(chunk)
-                    downloaded += len(chunk)
+            chunk_size = 1 << 18  # 256KB
+            # Demander le fichier tel quel : Content-Length correspond alors aux octets écrits
+            async with client.stream('GET', url, headers={'Accept-Encoding': 'identity'}) as response:
+                # Les erreurs définitives (404...) ne sont pas réessayées
+                if response.is_error and not is_retryable_status(response.status_code):
+                    logger.error(f"Échec du téléchargement (HTTP {response.status_code}): {url}")
+
+                    return False
+                response.raise_for_status()
+                total_size = int(response.headers.get('Content-Length', 0))
+                if response.headers.get('Content-Encoding', 'identity') != 'identity':
+                    # Content-Length compte alors les octets compressés, pas ceux écrits dans le fichier
+                    total_size = 0
+
+                with open(file_path, 'wb') as f:
                     if TQDM_AVAILABLE:
-                        pbar.update(len(chunk))
+                        progress = tqdm.wrapattr(f, 'write', total=total_size, desc=os.path.basename(file_path))
+                    else:
+                        progress = contextlib.nullcontext(f)
 
-                if TQDM_AVAILABLE:
-                    pbar.close()
+                    with progress as out:
+                        async for chunk in response.aiter_bytes(chunk_size):
+                            out.write(chunk)
+                    downloaded = f.tell()
 
             # Vérifier la taille du fichier téléchargé
             if 0 < total_size != downloaded:
                 logger.warning(f"Taille du fichier incomplète: {downloaded} sur {total_size} octets")
                 if attempt < retry_count - 1:
-                    logger.info(f"Nouvelle tentative dans {retry_delay} secondes...")
-                    time.sleep(retry_delay)
+                    delay = get_retry_delay(retry_delay, attempt)
+                    logger.info(f"Nouvelle tentative dans {delay} secondes...")
+                    await asyncio.sleep(delay)
                     continue
                 else:
                     return False
@@ -327,8 +472,9 @@ def download_file(url, file_path, expected_size=None, retry_count=3, retry_delay
         except Exception as e:
             logger.error(f"Erreur de téléchargement (tentative {attempt + 1}/{retry_count}): {e}")
             if attempt < retry_count - 1:
-                logger.info(f"Nouvelle tentative dans {retry_delay} secondes...")
-                time.sleep(retry_delay)
+                delay = get_retry_delay(retry_delay, attempt)
+                logger.info(f"Nouvelle tentative dans {delay} secondes...")
+                await asyncio.sleep(delay)
             else:
                 logger.error(f"Échec du téléchargement après {retry_count} tentatives")
 
@@ -336,58 +482,137 @@ def download_file(url, file_path, expected_size=None, retry_count=3, retry_delay
 
 
 def set_metadata(file_path, track_filename, album_info, track_number=None):
-    """Ajoute des métadonnées aux fichiers audio téléchargés"""
+    """Ajoute des métadonnées aux fichiers audio téléchargés, et indique si le fichier a été modifié"""
     if not MUTAGEN_AVAILABLE:
-        return
+        return False
 
     try:
         file_format = os.path.splitext(file_path)[1].lower()
 
         if file_format == '.flac':
             audio = FLAC(file_path)
-            audio['TITLE'] = track_filename
-            audio['ALBUM'] = album_info['title']
+            tags = {
+                'TITLE': track_filename,
+                'ALBUM': album_info['title']
+            }
             if track_number is not None:
-                audio['TRACKNUMBER'] = str(track_number)
-            audio.save()
+                tags['TRACKNUMBER'] = str(track_number)
+
+            # Ne pas réécrire le fichier si les métadonnées sont déjà correctes
+            if all(audio.get(key) == [value] for key, value in tags.items()):
+                logger.info(f"Métadonnées déjà à jour pour {file_path}")
+
+                return False
+
+            for key, value in tags.items():
+                audio[key] = value
+            # Réserver de la marge pour que les prochaines écritures se fassent sur place
+            audio.save(padding=lambda info: max(METADATA_PADDING, info.padding))
+            logger.info(f"Métadonnées ajoutées pour {file_path}")
+
+            return True
 
         elif file_format == '.mp3':
             # Pour les fichiers MP3, il faudrait utiliser ID3 de mutagen
             # Cette partie est simplement un exemple et pourrait être étendue
             pass
-
-        logger.info(f"Métadonnées ajoutées pour {file_path}")
     except Exception as e:
         logger.warning(f"Impossible d'ajouter des métadonnées: {e}")
 
+    return False
+
+
+def get_track_filename(track, config, track_number=None):
+    """Retourne le nom de fichier (sans extension) d'une piste"""
+    track_filename = track['name']
+    if config['include_track_number'] and track_number is not None:
+        track_filename = f"{track_number:02d} - {track_filename}"
+
+    return track_filename
+
+
+def load_track_sizes(output_dir):
+    """Charge les tailles des pistes déjà téléchargées dans un répertoire d'album"""
+    sizes_path = os.path.join(output_dir, TRACK_SIZES_FILE)
+    if not os.path.exists(sizes_path):
+        return {}
 
-def download_track(track, album_info, output_dir, config, track_number=None):
-    """Télécharge une piste spécifique"""
     try:
-        track_info = get_track_download_url(track['url'], config['format_preference'])
-        if not track_info:
-            logger.error(f"Impossible de récupérer l'URL de téléchargement pour {track['name']}")
-
-            return False
-
-        # Créer un nom de fichier sanitisé
-        track_filename = track['name']
-        if config['include_track_number'] and track_number is not None:
-            track_filename = f"{track_number:02d} - {track_filename}"
-
-        file_path = os.path.join(output_dir, f"{track_filename}.{track_info['format']}")
-
-        # Télécharger le fichier
-        success = download_file(
-            track_info['url'],
-            file_path,
-            track_info['size'],
-            config['retry_attempts'],
-            config['retry_delay']
-        )
+        with open(sizes_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"Erreur lors de la lecture des tailles des pistes: {e}")
+
+        return {}
+
+
+def record_track_size(output_dir, file_path, track_sizes):
+    """Enregistre la taille d'une piste téléchargée dans le fichier de tailles de l'album"""
+    track_sizes[os.path.basename(file_path)] = os.path.getsize(file_path)
+    try:
+        with open(os.path.join(output_dir, TRACK_SIZES_FILE), 'w', encoding='utf-8') as f:
+            json.dump(track_sizes, f, indent=4)
+    except Exception as e:
+        logger.warning(f"Erreur lors de la sauvegarde des tailles des pistes: {e}")
+
+
+def find_existing_track(output_dir, track_filename, config, track_sizes):
+    """Retourne le chemin d'une piste déjà téléchargée entièrement, ou None"""
+    for format_type in config['format_preference']:
+        file_name = f"{track_filename}.{format_type}"
+        file_path = os.path.join(output_dir, file_name)
+        expected_size = track_sizes.get(file_name)
+        if expected_size and os.path.exists(file_path) and os.path.getsize(file_path) == expected_size:
+            return file_path
+
+    return None
+
+
+async def keep_existing_track(file_path, track_filename, album_info, output_dir, track_sizes, track_number=None):
+    """Conserve une piste déjà téléchargée en mettant simplement à jour ses métadonnées"""
+    logger.info(f"Le fichier existe déjà et a la bonne taille: {file_path}")
+    loop = asyncio.get_running_loop()
+    if await loop.run_in_executor(None, set_metadata, file_path, track_filename, album_info, track_number):
+        # Les métadonnées ont changé la taille du fichier
+        record_track_size(output_dir, file_path, track_sizes)
+
+    return True
+
+
+async def download_track(client, semaphore, track, album_info, output_dir, config, track_sizes, track_number=None):
+    """Récupère l'URL de téléchargement d'une piste puis la télécharge"""
+    try:
+        # Une même place du sémaphore couvre la page de détail puis le fichier : chaque piste
+        # est téléchargée dès que son URL est connue, sans attendre les pages des autres pistes
+        async with semaphore:
+            track_info = await get_track_download_url(client, track['url'], config)
+            if not track_info:
+                logger.error(f"Impossible de récupérer l'URL de téléchargement pour {track['name']}")
+
+                return False
+
+            # Créer un nom de fichier sanitisé
+            track_filename = get_track_filename(track, config, track_number)
+            file_path = os.path.join(output_dir, f"{track_filename}.{track_info['format']}")
+
+            # Télécharger le fichier
+            success = await download_file(
+                client,
+                track_info['url'],
+                file_path,
+                track_info['size'],
+                config['retry_attempts'],
+                config['retry_delay']
+            )
 
         if success and MUTAGEN_AVAILABLE:
-            set_metadata(file_path, track_filename, album_info, track_number)
+            # L'écriture des métadonnées est bloquante : la faire hors de la boucle d'événements
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, set_metadata, file_path, track_filename, album_info, track_number)
+
+        # Enregistrer la taille finale, métadonnées comprises, pour reconnaître la piste au prochain lancement
+        if success:
+            record_track_size(output_dir, file_path, track_sizes)
 
         return success
     except Exception as e:
@@ -396,7 +621,7 @@ def download_track(track, album_info, output_dir, config, track_number=None):
         return False
 
 
-def download_album(album_url, config):
+async def download_album(client, semaphore, album_url, config, position=0):
     """Télécharge un album complet"""
     if not validate_url(album_url):
         logger.error(f"URL invalide: {album_url}")
@@ -404,7 +629,7 @@ def download_album(album_url, config):
         return False
 
     logger.info(f"Récupération des informations de l'album: {album_url}")
-    album_info = get_album_info(album_url, config)
+    album_info = await get_album_info(client, album_url, config)
 
     if not album_info or not album_info['tracks']:
         logger.error(f"Aucune piste trouvée pour l'album: {album_url}")
@@ -413,44 +638,85 @@ def download_album(album_url, config):
 
     # Créer le répertoire de sortie
     album_output_dir = os.path.join(config['output_directory'], album_info['title'])
-
-    if not os.path.exists(config['output_directory']):
-        os.makedirs(config['output_directory'])
-
-    if not os.path.exists(album_output_dir):
-        os.makedirs(album_output_dir)
+    os.makedirs(album_output_dir, exist_ok=True)
 
     logger.info(f"Téléchargement de {len(album_info['tracks'])} pistes vers {album_output_dir}")
 
-    # Téléchargement des pistes avec multithreading
+    # Téléchargement des pistes en parallèle, limité par le sémaphore partagé entre les albums
     success_count = 0
-    with ThreadPoolExecutor(max_workers=config['max_threads']) as executor:
-        futures = []
-        for i, track in enumerate(album_info['tracks']):
-            futures.append(
-                executor.submit(
-                    download_track, track, album_info, album_output_dir, config, i + 1
+    track_sizes = load_track_sizes(album_output_dir)
+    tasks = []
+    for i, track in enumerate(album_info['tracks']):
+        track_number = i + 1
+        track_filename = get_track_filename(track, config, track_number)
+
+        # Ne pas récupérer la page de détail des pistes déjà téléchargées
+        existing_path = find_existing_track(album_output_dir, track_filename, config, track_sizes)
+        if existing_path:
+            tasks.append(
+                keep_existing_track(existing_path, track_filename, album_info, album_output_dir, track_sizes, track_number)
+            )
+        else:
+            tasks.append(
+                download_track(
+                    client, semaphore, track, album_info, album_output_dir, config, track_sizes, track_number
                 )
             )
 
-        # Attendre la fin des téléchargements
-        for future in futures:
-            if future.result():
-                success_count += 1
+    # Comptabiliser les pistes dans l'ordre où elles se terminent
+    if TQDM_AVAILABLE:
+        album_pbar = tqdm(
+            total=len(album_info['tracks']), unit='piste', desc=album_info['title'], position=position
+        )
+
+    for task in asyncio.as_completed(tasks):
+        if await task:
+            success_count += 1
+        if TQDM_AVAILABLE:
+            album_pbar.update(1)
+
+    if TQDM_AVAILABLE:
+        album_pbar.close()
 
     logger.info(f"Album téléchargé: {success_count}/{len(album_info['tracks'])} pistes réussies")
 
     return success_count == len(album_info['tracks'])
 
 
+async def download_album_in_slot(client, semaphore, positions, album_url, config):
+    """Télécharge un album dès qu'un emplacement d'album simultané se libère"""
+    # L'emplacement sert aussi de position à la barre de progression de l'album
+    position = await positions.get()
+    try:
+        return await download_album(client, semaphore, album_url, config, position)
+    except Exception as e:
+        # Une erreur sur un album ne doit pas interrompre les autres albums en cours
+        logger.error(f"Erreur lors du téléchargement de l'album {album_url}: {e}")
+
+        return False
+    finally:
+        positions.put_nowait(position)
+
+
+async def download_albums(urls, config):
+    """Télécharge une liste d'albums en parallèle en partageant le même client HTTP"""
+    # Le sémaphore limite le nombre total de requêtes simultanées, tous albums confondus
+    semaphore = asyncio.Semaphore(config['max_threads'])
+    positions = asyncio.Queue()
+    for position in range(MAX_CONCURRENT_ALBUMS):
+        positions.put_nowait(position)
+
+    async with create_client(config) as client:
+        results = await asyncio.gather(
+            *(download_album_in_slot(client, semaphore, positions, url, config) for url in urls)
+        )
+
+    return sum(1 for success in results if success)
+
+
 def sanitize_filename(filename):
     """Supprime les caractères spéciaux interdits dans les noms de fichiers Windows"""
-    # Caractères interdits dans les noms de fichiers Windows: \ / : * ? " < > |
-    forbidden_chars = ['\\', '/', ':', '*', '?', '"', '<', '>', '|']
-    for char in forbidden_chars:
-        filename = filename.replace(char, '')
-
-    return filename
+    return filename.translate(SANITIZE_TABLE)
 
 
 def main():
@@ -495,13 +761,14 @@ def main():
     if args.input_file and os.path.exists(args.input_file):
         try:
             with open(args.input_file, 'r') as f:
-                for line in f:
-                    url = line.strip()
-                    if url and not url.startswith('#'):
-                        urls_to_process.append(url)
+                lines = (line.strip() for line in f)
+                urls_to_process.extend(line for line in lines if line and not line.startswith('#'))
         except Exception as e:
             logger.error(f"Erreur lors de la lecture du fichier d'entrée: {e}")
 
+    # Ignorer les URLs en double en conservant l'ordre
+    urls_to_process = list(dict.fromkeys(urls_to_process))
+
     # Si aucune URL n'est spécifiée, demander à l'utilisateur
     if not urls_to_process:
         print("\nTéléchargeur d'albums KHInsider")
@@ -521,10 +788,7 @@ def main():
                 print("URL invalide. Veuillez entrer une URL valide de KHInsider.")
 
     # Télécharger chaque album
-    success_count = 0
-    for url in urls_to_process:
-        if download_album(url, config):
-            success_count += 1
+    success_count = asyncio.run(download_albums(urls_to_process, config))
 
     logger.info(f"Téléchargement terminé: {success_count}/{len(urls_to_process)} albums réussis")
     print(f"\nTéléchargement terminé: {success_count}/{len(urls_to_process)} albums réussis")